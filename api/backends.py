@@ -0,0 +1,239 @@
+import html
+import json
+from typing import Any, Iterator
+
+
+# backends that render the items returned by google_forms.parse_markdown into other formats than Google Apps Script.
+# sections are declared before being used and then moved into place in Apps Script, here they are only rendered at
+# the place they end up (the 'edit_section' item)
+_ignored_items = ('section', 'move_section_to_end')
+
+
+def _stream_json_array(key: str, objects: Iterator[dict[str, Any]]) -> Iterator[str]:
+    yield f'{{"{key}": ['
+    separator = '\n'
+
+    for obj in objects:
+        yield f'{separator}  {json.dumps(obj, ensure_ascii=False)}'
+        separator = ',\n'
+
+    yield '\n]}'
+
+
+def _options(kwargs: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{'value': choice} for choice in kwargs.get('choices', ())]
+
+
+def _forms_api_item(kind: str, kwargs: dict[str, Any]) -> dict[str, Any]:
+    # https://developers.google.com/forms/api/reference/rest/v1/forms#item
+    item = {'title': kwargs.get('title', '')}
+
+    if len(kwargs.get('description', '')) > 0:
+        item['description'] = kwargs['description']
+
+    if kind == 'edit_section':
+        item['pageBreakItem'] = {}
+        return item
+
+    if kind == 'title_and_description':
+        item['textItem'] = {}
+        return item
+
+    question = {'required': kwargs.get('required', False)}
+
+    if kind in ('grid', 'checkbox_grid'):
+        choice_type = 'RADIO' if kind == 'grid' else 'CHECKBOX'
+        item['questionGroupItem'] = {
+            'questions': [{'required': question['required'], 'rowQuestion': {'title': row}}
+                          for row in kwargs.get('rows', ())],
+            'grid': {'columns': {'type': choice_type,
+                                 'options': [{'value': column} for column in kwargs.get('columns', ())]}},
+        }
+        return item
+
+    if kind == 'short_text':
+        question['textQuestion'] = {'paragraph': False}
+
+    elif kind == 'paragraph_text':
+        question['textQuestion'] = {'paragraph': True}
+
+    elif kind in ('multiple_choice', 'checkbox', 'list'):
+        choice_type = {'multiple_choice': 'RADIO', 'checkbox': 'CHECKBOX', 'list': 'DROP_DOWN'}[kind]
+        question['choiceQuestion'] = {'type': choice_type, 'options': _options(kwargs)}
+
+    elif kind == 'scale':
+        question['scaleQuestion'] = {'low': int(kwargs.get('min', 0)), 'high': int(kwargs.get('max', -1)),
+                                     'lowLabel': kwargs.get('min_label', ''),
+                                     'highLabel': kwargs.get('max_label', '')}
+
+    elif kind in ('date', 'date_time'):
+        question['dateQuestion'] = {'includeTime': kind == 'date_time', 'includeYear': True}
+
+    elif kind in ('time', 'duration'):
+        question['timeQuestion'] = {'duration': kind == 'duration'}
+
+    else:
+        raise ValueError(f'Unknown item: {kind}')
+
+    item['questionItem'] = {'question': question}
+    return item
+
+
+def _forms_api_requests(items: list[tuple[str, dict[str, Any]]]) -> Iterator[dict[str, Any]]:
+    index = 0
+
+    for kind, kwargs in items:
+        if kind in _ignored_items:
+            continue
+
+        if kind == 'form':
+            # https://developers.google.com/forms/api/reference/rest/v1/forms/batchUpdate#updateforminforequest
+            info = {'title': kwargs.get('title', ''), 'description': kwargs.get('description', '')}
+            yield {'updateFormInfo': {'info': info, 'updateMask': 'title,description'}}
+            continue
+
+        # https://developers.google.com/forms/api/reference/rest/v1/forms/batchUpdate#createitemrequest
+        yield {'createItem': {'item': _forms_api_item(kind, kwargs), 'location': {'index': index}}}
+        index += 1
+
+
+def forms_api_backend(items: list[tuple[str, dict[str, Any]]], function_name: str) -> Iterator[str]:
+    # body of a forms.batchUpdate request, to be sent after creating an empty form with forms.create.
+    # navigation between sections needs the ids of the created sections, so it is left out
+    return _stream_json_array('requests', _forms_api_requests(items))
+
+
+def _json_schema_item(kind: str, kwargs: dict[str, Any]) -> dict[str, Any]:
+    item = {'type': 'section' if kind == 'edit_section' else kind,
+            'title': kwargs.get('title', ''),
+            'description': kwargs.get('description', '')}
+
+    if kind == 'form':
+        item['confirmation_message'] = kwargs.get('confirmation_message', '')
+        return item
+
+    if kind in ('edit_section', 'title_and_description'):
+        return item
+
+    item['required'] = kwargs.get('required', False)
+
+    if kind in ('multiple_choice', 'checkbox', 'list'):
+        navigation = kwargs.get('navigation', ())
+        item['choices'] = _options(kwargs)
+        for option, section in zip(item['choices'], navigation):
+            if len(section) > 0:
+                option['section'] = section
+
+    elif kind in ('grid', 'checkbox_grid'):
+        item['rows'] = list(kwargs.get('rows', ()))
+        item['columns'] = list(kwargs.get('columns', ()))
+
+    elif kind == 'scale':
+        item['min'] = int(kwargs.get('min', 0))
+        item['max'] = int(kwargs.get('max', -1))
+        item['min_label'] = kwargs.get('min_label', '')
+        item['max_label'] = kwargs.get('max_label', '')
+
+    return item
+
+
+def json_schema_backend(items: list[tuple[str, dict[str, Any]]], function_name: str) -> Iterator[str]:
+    # plain description of the form, with one entry per item in the order they appear
+    return _stream_json_array('items', (_json_schema_item(kind, kwargs) for kind, kwargs in items
+                                        if kind not in _ignored_items))
+
+
+def _html_choices(input_type: str, name: str, values: tuple[str]) -> list[str]:
+    return [f'<label><input type="{input_type}" name="{name}" value="{html.escape(v)}"> {html.escape(v)}</label><br>'
+            for v in values]
+
+
+def _html_grid(input_type: str, name: str, rows: tuple[str], columns: tuple[str]) -> list[str]:
+    lines = ['<table>', '<tr><th></th>' + ''.join(f'<th>{html.escape(c)}</th>' for c in columns) + '</tr>']
+
+    for i, row in enumerate(rows):
+        cells = ''.join(f'<td><input type="{input_type}" name="{name}_{i}" value="{html.escape(c)}"></td>'
+                        for c in columns)
+        lines.append(f'<tr><th>{html.escape(row)}</th>{cells}</tr>')
+
+    lines.append('</table>')
+    return lines
+
+
+def _html_item(kind: str, kwargs: dict[str, Any], name: str) -> str:
+    title = html.escape(kwargs.get('title', ''))
+    description = html.escape(kwargs.get('description', ''))
+
+    if kind == 'form':
+        lines = [f'<h1>{title}</h1>']
+        if len(description) > 0:
+            lines.append(f'<p>{description}</p>')
+
+        return '\n'.join(lines) + '\n'
+
+    if kind == 'edit_section':
+        lines = ['<hr>', f'<h2>{title}</h2>']
+        if len(description) > 0:
+            lines.append(f'<p>{description}</p>')
+
+        return '\n'.join(lines) + '\n'
+
+    if kind == 'title_and_description':
+        lines = [f'<h3>{title}</h3>']
+        if len(description) > 0:
+            lines.append(f'<p>{description}</p>')
+
+        return '\n'.join(lines) + '\n'
+
+    required = ' *' if kwargs.get('required', False) else ''
+    lines = ['<fieldset>', f'<legend>{title}{required}</legend>']
+    if len(description) > 0:
+        lines.append(f'<p>{description}</p>')
+
+    if kind == 'short_text':
+        lines.append(f'<input type="text" name="{name}">')
+
+    elif kind == 'paragraph_text':
+        lines.append(f'<textarea name="{name}"></textarea>')
+
+    elif kind == 'multiple_choice':
+        lines.extend(_html_choices('radio', name, kwargs.get('choices', ())))
+
+    elif kind == 'checkbox':
+        lines.extend(_html_choices('checkbox', name, kwargs.get('choices', ())))
+
+    elif kind == 'list':
+        options = ''.join(f'<option>{html.escape(c)}</option>' for c in kwargs.get('choices', ()))
+        lines.append(f'<select name="{name}">{options}</select>')
+
+    elif kind == 'scale':
+        values = [str(v) for v in range(int(kwargs.get('min', 0)), int(kwargs.get('max', -1)) + 1)]
+        lines.append(html.escape(kwargs.get('min_label', '')))
+        lines.extend(_html_choices('radio', name, tuple(values)))
+        lines.append(html.escape(kwargs.get('max_label', '')))
+
+    elif kind in ('date', 'time', 'date_time', 'duration'):
+        input_type = {'date': 'date', 'time': 'time', 'date_time': 'datetime-local', 'duration': 'time'}[kind]
+        step = ' step="1"' if kind == 'duration' else ''
+        lines.append(f'<input type="{input_type}" name="{name}"{step}>')
+
+    elif kind in ('grid', 'checkbox_grid'):
+        input_type = 'radio' if kind == 'grid' else 'checkbox'
+        lines.extend(_html_grid(input_type, name, kwargs.get('rows', ()), kwargs.get('columns', ())))
+
+    else:
+        raise ValueError(f'Unknown item: {kind}')
+
+    lines.append('</fieldset>')
+    return '\n'.join(lines) + '\n'
+
+
+def html_backend(items: list[tuple[str, dict[str, Any]]], function_name: str) -> Iterator[str]:
+    # static preview of the form, without any styling
+    yield '<form>\n'
+
+    for i, (kind, kwargs) in enumerate(items):
+        if kind not in _ignored_items:
+            yield _html_item(kind, kwargs, f'item{i}')
+
+    yield '</form>'
@@ -0,0 +1,36 @@
+import json
+
+from .google_forms import convert_document
+
+
+# plain WSGI handler for the JSON conversion endpoint, kept free of Flask and Jinja so cold starts only pay for the converter
+def _json_response(start_response, status: str, body: dict) -> list[bytes]:
+    data = json.dumps(body).encode('utf-8')
+    start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(data)))])
+    return [data]
+
+
+def app(environ, start_response) -> list[bytes]:
+    if environ.get('REQUEST_METHOD') != 'POST':
+        return _json_response(start_response, '405 Method Not Allowed', {'error': 'Only POST is supported'})
+
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+
+    try:
+        payload = json.loads(environ['wsgi.input'].read(length) or b'{}')
+    except ValueError:
+        return _json_response(start_response, '400 Bad Request', {'error': 'Body must be valid JSON'})
+
+    code = payload.get('markdown_code') if isinstance(payload, dict) else None
+    if not isinstance(code, str) or len(code) == 0:
+        return _json_response(start_response, '400 Bad Request', {'error': 'Missing "markdown_code"'})
+
+    try:
+        form_script = convert_document(code, payload.get('backend', 'apps_script'), payload.get('multiple_forms', False))
+    except Exception as e:
+        return _json_response(start_response, '400 Bad Request', {'error': str(e)})
+
+    return _json_response(start_response, '200 OK', {'form_script': form_script})
@@ -1,33 +1,66 @@
 import logging
+import os
 import re
-from typing import Any, Union
+import sys
+from typing import Any, Callable, Iterator, Optional, Union
+
+from .backends import forms_api_backend, html_backend, json_schema_backend
 
 
 _logger = logging.getLogger(__name__)
 
-_main_title_regex = re.compile(r'^#[\s]*(.*)$')
-_confirmation_message_regex = re.compile(r'^_(.*)_$')
-_section_regex = re.compile(r'^##[\s]*(.*)$')
-_title_regex = re.compile(r'^###[\s]*(.*)$')
-_combobox_regex = re.compile(r'^-[\s]*(.*)$')
-_radio_button_regex = re.compile(r'^\*[\s]*(.*)$')
-_checkbox_regex = re.compile(r'^([-*][\s]*)?\[[\s]*\] (.*)$')
-_navigation_regex = re.compile(r'^(.*) \[(.*)\]$')
-_paragraph_regex = re.compile(r'^[\s]*```(.|\s)*```[\s]*$')
-_short_text_regex = re.compile(r'^`(.*)`$')
-_required_regex = re.compile(r'^\*\*(.*)\*\*$')
-_scale_regex = re.compile(r'^(.*) (\d)+ --- (\d)+ (.*)$')
-_date_regex = re.compile(r'^dd|[\d]{2}/mm|[\d]{2}/yyyy|[\d]{4}$')
-_time_regex = re.compile(r'^hh|[\d]{2}:mm|[\d]{2}$')
-_date_time_regex = re.compile(r'^dd|[\d]{2}/mm|[\d]{2}/yyyy|[\d]{4} hh|[\d]{2}:mm|[\d]{2}$')
-_duration_regex = re.compile(r'^hh|[\d]{2}:mm|[\d]{2}:ss|[\d]{2}$')
-_column_row_radio_button_grid_regex = re.compile(r'^####[\s]*(.*)$')
-_column_row_checkbox_grid_regex = re.compile(r'^####[\s]*\[[\s]*\] (.*)$')
-
-
-def begin_create_form():
+
+class _LazyRegex:
+    # compiles the pattern on first use, so importing this module on a cold start stays cheap
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self._compiled: Optional[re.Pattern] = None
+
+    def match(self, string: str) -> Optional[re.Match]:
+        if self._compiled is None:
+            self._compiled = re.compile(self.pattern)
+            # later calls go straight to the compiled pattern, without passing through this method
+            self.match = self._compiled.match
+
+        return self._compiled.match(string)
+
+
+_main_title_regex = _LazyRegex(r'^#[\s]*(.*)$')
+_confirmation_message_regex = _LazyRegex(r'^_(.*)_$')
+_section_regex = _LazyRegex(r'^##[\s]*(.*)$')
+_title_regex = _LazyRegex(r'^###[\s]*(.*)$')
+_combobox_regex = _LazyRegex(r'^-[\s]*(.*)$')
+_radio_button_regex = _LazyRegex(r'^\*[\s]*(.*)$')
+_checkbox_regex = _LazyRegex(r'^([-*][\s]*)?\[[\s]*\] (.*)$')
+_navigation_regex = _LazyRegex(r'^(.*) \[(.*)\]$')
+_paragraph_regex = _LazyRegex(r'^[\s]*```(.|\s)*```[\s]*$')
+_short_text_regex = _LazyRegex(r'^`(.*)`$')
+_required_regex = _LazyRegex(r'^\*\*(.*)\*\*$')
+_scale_regex = _LazyRegex(r'^(.*) (\d)+ --- (\d)+ (.*)$')
+_date_regex = _LazyRegex(r'^dd|[\d]{2}/mm|[\d]{2}/yyyy|[\d]{4}$')
+_time_regex = _LazyRegex(r'^hh|[\d]{2}:mm|[\d]{2}$')
+_date_time_regex = _LazyRegex(r'^dd|[\d]{2}/mm|[\d]{2}/yyyy|[\d]{4} hh|[\d]{2}:mm|[\d]{2}$')
+_duration_regex = _LazyRegex(r'^hh|[\d]{2}:mm|[\d]{2}:ss|[\d]{2}$')
+_column_row_radio_button_grid_regex = _LazyRegex(r'^####[\s]*(.*)$')
+_column_row_checkbox_grid_regex = _LazyRegex(r'^####[\s]*\[[\s]*\] (.*)$')
+_form_start_regex = _LazyRegex(r'^[\s]*#(?!#)')
+
+Backend = Callable[[list[tuple[str, dict[str, Any]]], str], Iterator[str]]
+
+_value_list_args = ('choices', 'rows', 'columns')
+_label_args = ('min_label', 'max_label')
+
+# smaller multi-form documents are converted serially, since sending them to other processes costs more than it saves
+_parallel_min_forms = 32
+_parallel_min_lines = 10000
+_executor = None
+_executor_workers = None
+_executor_unavailable = False
+
+
+def begin_create_form(function_name: str = 'createForm'):
     _logger.debug('Creating form')
-    return 'function createForm() {\n'
+    return f'function {function_name}() {{\n'
 
 
 def end_create_form():
@@ -35,6 +68,22 @@ def end_create_form():
     return '}'
 
 
+def _list_code(values: Union[list[str], tuple[str]], shared: dict[tuple[str], str]) -> str:
+    # repeated value lists are declared once and referenced by name
+    name = shared.get(tuple(values))
+    if name is not None:
+        return name
+
+    return str(list(values))
+
+
+def _choice_code(choice: str, section: str) -> str:
+    if len(section) > 0:
+        return f'item.createChoice("{choice}", sections["{section}"])'
+
+    return f'item.createChoice("{choice}")'
+
+
 def _concatenate_lines(lines: Union[list[str], tuple[str]], identation_level: int = 1, identation: str = 2 * ' '):
     return '\n'.join([f'{identation * identation_level}{line}' for line in lines])
 
@@ -163,14 +212,16 @@ def _create_multiple_choice_item(**kwargs) -> str:
     description = kwargs.get('description', '')
     required = kwargs.get('required', False)
     choices = kwargs.get('choices', [])
+    navigation = kwargs.get('navigation', ())
+    shared = kwargs.get('shared', {})
 
-    if any(c.startswith('item.createChoice(') for c in choices):
+    if len(navigation) > 0:
         lines = ['var item = form.addMultipleChoiceItem()',
                  f'  .setTitle("{title}");\n']
 
         lines.append('item.setChoices([')
-        for choice in choices:
-            lines.append(f'    {choice},')
+        for choice, section in zip(choices, navigation):
+            lines.append(f'    {_choice_code(choice, section)},')
 
         lines[-1] = lines[-1][:-1]
         lines.append('  ])')
@@ -178,7 +229,7 @@ def _create_multiple_choice_item(**kwargs) -> str:
     else:
         lines = ['form.addMultipleChoiceItem()',
                  f'  .setTitle("{title}")',
-                 f'  .setChoiceValues({choices})']
+                 f'  .setChoiceValues({_list_code(choices, shared)})']
 
     if len(description) > 0:
         lines.append(f'  .setHelpText("{description}")')
@@ -201,14 +252,16 @@ def _create_checkbox_item(**kwargs) -> str:
     description = kwargs.get('description', '')
     required = kwargs.get('required', False)
     choices = kwargs.get('choices', [])
+    navigation = kwargs.get('navigation', ())
+    shared = kwargs.get('shared', {})
 
-    if any(c.startswith('item.createChoice(') for c in choices):
+    if len(navigation) > 0:
         lines = ['var item = form.addMultipleChoiceItem()',
                  f'  .setTitle("{title}");']
 
         lines.append('item.setChoices([')
-        for choice in choices:
-            lines.append(f'    {choice},')
+        for choice, section in zip(choices, navigation):
+            lines.append(f'    {_choice_code(choice, section)},')
 
         lines[-1] = lines[-1][:-1]
         lines.append('  ])')
@@ -216,7 +269,7 @@ def _create_checkbox_item(**kwargs) -> str:
     else:
         lines = ['form.addMultipleChoiceItem()',
                  f'  .setTitle("{title}")',
-                 f'  .setChoiceValues({choices})']
+                 f'  .setChoiceValues({_list_code(choices, shared)})']
 
     if len(description) > 0:
         lines.append(f'  .setHelpText("{description}")')
@@ -237,14 +290,16 @@ def _create_list_item(**kwargs) -> str:
     description = kwargs.get('description', '')
     required = kwargs.get('required', False)
     choices = kwargs.get('choices', [])
+    navigation = kwargs.get('navigation', ())
+    shared = kwargs.get('shared', {})
 
-    if any(c.startswith('item.createChoice(') for c in choices):
+    if len(navigation) > 0:
         lines = ['var item = form.addMultipleChoiceItem()',
                  f'  .setTitle("{title}");']
 
         lines.append('item.setChoices([')
-        for choice in choices:
-            lines.append(f'    {choice},')
+        for choice, section in zip(choices, navigation):
+            lines.append(f'    {_choice_code(choice, section)},')
 
         lines[-1] = lines[-1][:-1]
         lines.append('  ])')
@@ -252,7 +307,7 @@ def _create_list_item(**kwargs) -> str:
     else:
         lines = ['form.addMultipleChoiceItem()',
                  f'  .setTitle("{title}")',
-                 f'  .setChoiceValues({choices})']
+                 f'  .setChoiceValues({_list_code(choices, shared)})']
 
     if len(description) > 0:
         lines.append(f'  .setHelpText("{description}")')
@@ -390,11 +445,12 @@ def _create_grid_item(**kwargs) -> str:
     required = kwargs.get('required', False)
     rows = kwargs.get('rows', [])
     columns = kwargs.get('columns', [])
+    shared = kwargs.get('shared', {})
 
     lines = ['form.addGridItem()',
              f'  .setTitle("{title}")',
-             f'  .setRows({rows})',
-             f'  .setColumns({columns})']
+             f'  .setRows({_list_code(rows, shared)})',
+             f'  .setColumns({_list_code(columns, shared)})']
 
     if len(description) > 0:
         lines.append(f'  .setHelpText("{description}")')
@@ -416,11 +472,12 @@ def _create_checkbox_grid_item(**kwargs) -> str:
     required = kwargs.get('required', False)
     rows = kwargs.get('rows', [])
     columns = kwargs.get('columns', [])
+    shared = kwargs.get('shared', {})
 
     lines = ['form.addCheckboxGridItem()',
              f'  .setTitle("{title}")',
-             f'  .setRows({rows})',
-             f'  .setColumns({columns})']
+             f'  .setRows({_list_code(rows, shared)})',
+             f'  .setColumns({_list_code(columns, shared)})']
 
     if len(description) > 0:
         lines.append(f'  .setHelpText("{description}")')
@@ -435,7 +492,7 @@ def _create_checkbox_grid_item(**kwargs) -> str:
     return '\n' + _concatenate_lines(lines)
 
 
-def _move_section_to_end_of_form(title: str) -> str:
+def _move_section_to_end_of_form(title: str, **kwargs) -> str:
     # https://developers.google.com/apps-script/reference/forms/form#moveitemto
 
     lines = [f'form.moveItem(form.getItemById(sections["{title}"].getId()), form.getItems().length - 1);\n']
@@ -446,39 +503,169 @@ def _move_section_to_end_of_form(title: str) -> str:
     return '\n' + _concatenate_lines(lines)
 
 
+def _intern_values(values: list[str], interned: dict[tuple[str], tuple[str]]) -> tuple[str]:
+    # identical value lists end up as the same tuple, holding the same strings
+    values = tuple(sys.intern(v) for v in values)
+    return interned.setdefault(values, values)
+
+
+def _snapshot_args(args: dict[str, Any], interned: dict[tuple[str], tuple[str]]) -> dict[str, Any]:
+    snapshot = dict(args)
+
+    for key in _value_list_args:
+        snapshot[key] = _intern_values(args[key], interned)
+
+    for key in _label_args:
+        snapshot[key] = sys.intern(args[key])
+
+    # sections each choice navigates to, only kept when there is any navigation
+    snapshot['navigation'] = tuple(args['navigation']) if any(len(n) > 0 for n in args['navigation']) else ()
+
+    return snapshot
+
+
+def _share_repeated_lists(items: list[tuple[str, dict[str, Any]]]) -> dict[tuple[str], str]:
+    counts = {}
+
+    for _, kwargs in items:
+        for key in _value_list_args:
+            values = kwargs.get(key, ())
+            # navigation choices reference the item being created, so they can't be shared
+            if key == 'choices' and len(kwargs.get('navigation', ())) > 0:
+                continue
+
+            if len(values) > 0:
+                counts[values] = counts.get(values, 0) + 1
+
+    repeated = [values for values, count in counts.items() if count > 1]
+    _logger.debug(f'Sharing {len(repeated)} repeated value lists')
+
+    return {values: f'values{i}' for i, values in enumerate(repeated, 1)}
+
+
+def _declare_shared_lists(shared: dict[tuple[str], str], identation_level: int = 1) -> str:
+    if len(shared) == 0:
+        return ''
+
+    lines = [f'var {name} = {list(values)};' for values, name in shared.items()]
+    lines[-1] += '\n'
+
+    return _concatenate_lines(lines, identation_level) + '\n'
+
+
+def _apps_script_backend(items: list[tuple[str, dict[str, Any]]], function_name: str,
+                         shared: Optional[dict[tuple[str], str]] = None) -> Iterator[str]:
+    # lists shared with other forms of the same script are given, and declared by whoever combines the forms
+    yield begin_create_form(function_name)
+    if shared is None:
+        shared = _share_repeated_lists(items)
+        yield _declare_shared_lists(shared)
+
+    for kind, kwargs in items:
+        yield _apps_script_builders[kind](**kwargs, shared=shared)
+
+    yield end_create_form()
+
+
+_apps_script_builders = {
+    'form': _create_form,
+    'section': _create_section,
+    'edit_section': edit_section,
+    'move_section_to_end': _move_section_to_end_of_form,
+    'title_and_description': _create_title_and_description_item,
+    'short_text': _create_short_text_item,
+    'paragraph_text': _create_paragraph_text_item,
+    'multiple_choice': _create_multiple_choice_item,
+    'checkbox': _create_checkbox_item,
+    'list': _create_list_item,
+    'scale': _create_scale_item,
+    'date': _create_date_item,
+    'time': _create_time_item,
+    'date_time': _create_date_time_item,
+    'duration': _create_duration_item,
+    'grid': _create_grid_item,
+    'checkbox_grid': _create_checkbox_grid_item,
+}
+
+_backends: dict[str, Backend] = {
+    'apps_script': _apps_script_backend,
+    'forms_api': forms_api_backend,
+    'json_schema': json_schema_backend,
+    'html': html_backend,
+}
+
+
+def _copy_args(args: dict[str, Any]) -> dict[str, Any]:
+    return {key: list(value) if isinstance(value, list) else value for key, value in args.items()}
+
+
 def _reset_args(args: dict[str, Any]) -> None:
     args['title'] = ''
     args['description'] = ''
     args['required'] = False
     args['choices'] = []
+    args['navigation'] = []
     args['rows'] = []
     args['columns'] = []
 
 
-def create_google_apps_script(markdown_file: str) -> None:
-    current_function = None
-    grid = False
-    code = begin_create_form()
-    created_main_title = False
-    created_first_item = False
-
-    row = False
-
-    args = {
-        'title': '',
-        'confirmation_message': '',
-        'description': '',
-        'required': False,
-        'choices': [],
-        'rows': [],
-        'columns': [],
-        'min': -1,
-        'max': -1,
-        'min_label': '',
-        'max_label': '',
-    }
-
-    for i, line in enumerate(markdown_file.strip().split('\n')):
+def _is_checkpoint_line(line: str) -> bool:
+    # titles and sections start new items, so the parser state before them is saved to resume parsing from there
+    line = line.strip()
+    return line.startswith('#') and not line.startswith('####')
+
+
+def _parse_lines(lines: list[str], items: list[tuple[str, dict[str, Any]]], interned: dict[tuple[str], tuple[str]],
+                 checkpoint: Optional[dict[str, Any]] = None) -> list[dict[str, Any]]:
+    # parses the lines into items, starting from the given checkpoint, and returns the checkpoints it went through
+    if checkpoint is None:
+        checkpoint = {
+            'line': 0,
+            'items': 0,
+            'current_item': None,
+            'grid': False,
+            'row': False,
+            'created_main_title': False,
+            'created_first_item': False,
+            'args': {
+                'title': '',
+                'confirmation_message': '',
+                'description': '',
+                'required': False,
+                'choices': [],
+                'navigation': [],
+                'rows': [],
+                'columns': [],
+                'min': -1,
+                'max': -1,
+                'min_label': '',
+                'max_label': '',
+            },
+        }
+
+    current_item = checkpoint['current_item']
+    grid = checkpoint['grid']
+    created_main_title = checkpoint['created_main_title']
+    created_first_item = checkpoint['created_first_item']
+    row = checkpoint['row']
+    args = _copy_args(checkpoint['args'])
+    del items[checkpoint['items']:]
+    checkpoints = []
+
+    for i in range(checkpoint['line'], len(lines)):
+        line = lines[i]
+        if _is_checkpoint_line(line):
+            checkpoints.append({
+                'line': i,
+                'items': len(items),
+                'current_item': current_item,
+                'grid': grid,
+                'row': row,
+                'created_main_title': created_main_title,
+                'created_first_item': created_first_item,
+                'args': _copy_args(args),
+            })
+
         _logger.debug(f'Processing line {i}: {line}')
         # the order of function calls here matters
         line = line.strip()
@@ -488,35 +675,35 @@ def create_google_apps_script(markdown_file: str) -> None:
         match = _column_row_checkbox_grid_regex.match(line)
         if match is not None:
             row = match.group(1).strip().lower() == 'rows'
-            current_function = _create_checkbox_grid_item
+            current_item = 'checkbox_grid'
             grid = True
             continue
 
         match = _column_row_radio_button_grid_regex.match(line)
         if match is not None:
             row = match.group(1).strip().lower() == 'rows'
-            current_function = _create_grid_item
+            current_item = 'grid'
             grid = True
             continue
 
         # when reaching a new title or section, create the previous item
         match = _title_regex.match(line)
         if match is not None:
-            if current_function is not None:
-                if current_function == _create_form:
+            if current_item is not None:
+                if current_item == 'form':
                     created_main_title = True
 
-                code += current_function(**args)
+                items.append((current_item, _snapshot_args(args, interned)))
                 grid = False
 
-                if current_function == edit_section:
-                    code += _move_section_to_end_of_form(args['title'])
+                if current_item == 'edit_section':
+                    items.append(('move_section_to_end', {'title': args['title']}))
 
                 _reset_args(args)
-                current_function = None
+                current_item = None
 
             elif created_first_item:
-                code += _create_title_and_description_item(**args)
+                items.append(('title_and_description', _snapshot_args(args, interned)))
                 grid = False
                 _reset_args(args)
 
@@ -535,17 +722,17 @@ def create_google_apps_script(markdown_file: str) -> None:
 
         match = _section_regex.match(line)
         if match is not None:
-            if current_function is not None:
-                if current_function == _create_form:
+            if current_item is not None:
+                if current_item == 'form':
                     created_main_title = True
 
-                code += current_function(**args)
+                items.append((current_item, _snapshot_args(args, interned)))
                 grid = False
                 _reset_args(args)
-                current_function = None
+                current_item = None
 
             elif created_first_item:
-                code += _create_title_and_description_item(**args)
+                items.append(('title_and_description', _snapshot_args(args, interned)))
                 grid = False
                 _reset_args(args)
 
@@ -553,7 +740,7 @@ def create_google_apps_script(markdown_file: str) -> None:
                 created_first_item = True
 
             args['title'] = match.group(1)
-            current_function = edit_section
+            current_item = 'edit_section'
             continue
 
         match = _main_title_regex.match(line)
@@ -562,7 +749,7 @@ def create_google_apps_script(markdown_file: str) -> None:
                 raise Exception('Main title already created')
 
             args['title'] = match.group(1)
-            current_function = _create_form
+            current_item = 'form'
             continue
 
         match = _confirmation_message_regex.match(line)
@@ -573,12 +760,12 @@ def create_google_apps_script(markdown_file: str) -> None:
 
         match = _paragraph_regex.match(line)
         if match is not None:
-            current_function = _create_paragraph_text_item
+            current_item = 'paragraph_text'
             continue
 
         match = _short_text_regex.match(line)
         if match is not None:
-            current_function = _create_short_text_item
+            current_item = 'short_text'
             continue
 
         match = _checkbox_regex.match(line)
@@ -596,22 +783,24 @@ def create_google_apps_script(markdown_file: str) -> None:
                     if match is not None:
                         option = match.group(1)
                         section = match.group(2)
-                        args['choices'].append(f'item.createChoice("{option}", sections["{section}"])')
+                        args['choices'].append(option)
+                        args['navigation'].append(section)
 
                     else:
                         args['choices'].append(option)
+                        args['navigation'].append('')
 
-                    current_function = _create_checkbox_item
+                    current_item = 'checkbox'
 
             else:
-                if current_function == _create_form:
+                if current_item == 'form':
                     created_main_title = True
-                    code += current_function(**args)
+                    items.append((current_item, _snapshot_args(args, interned)))
                     _reset_args(args)
-                    current_function = None
+                    current_item = None
                     grid = False
 
-                code += _create_section(title=match.group(2))
+                items.append(('section', {'title': match.group(2)}))
 
             continue
 
@@ -630,22 +819,24 @@ def create_google_apps_script(markdown_file: str) -> None:
                     if match is not None:
                         option = match.group(1)
                         section = match.group(2)
-                        args['choices'].append(f'item.createChoice("{option}", sections["{section}"])')
+                        args['choices'].append(option)
+                        args['navigation'].append(section)
 
                     else:
                         args['choices'].append(option)
+                        args['navigation'].append('')
 
-                    current_function = _create_multiple_choice_item
+                    current_item = 'multiple_choice'
 
             else:
-                if current_function == _create_form:
+                if current_item == 'form':
                     created_main_title = True
-                    code += current_function(**args)
+                    items.append((current_item, _snapshot_args(args, interned)))
                     _reset_args(args)
-                    current_function = None
+                    current_item = None
                     grid = False
 
-                code += _create_section(title=match.group(1))
+                items.append(('section', {'title': match.group(1)}))
 
             continue
 
@@ -664,21 +855,23 @@ def create_google_apps_script(markdown_file: str) -> None:
                     if match is not None:
                         option = match.group(1)
                         section = match.group(2)
-                        args['choices'].append(f'item.createChoice("{option}", sections["{section}"])')
+                        args['choices'].append(option)
+                        args['navigation'].append(section)
 
                     else:
                         args['choices'].append(option)
-                    current_function = _create_list_item
+                        args['navigation'].append('')
+                    current_item = 'list'
 
             else:
-                if current_function == _create_form:
+                if current_item == 'form':
                     created_main_title = True
-                    code += current_function(**args)
+                    items.append((current_item, _snapshot_args(args, interned)))
                     _reset_args(args)
-                    current_function = None
+                    current_item = None
                     grid = False
 
-                code += _create_section(title=match.group(1))
+                items.append(('section', {'title': match.group(1)}))
 
             continue
 
@@ -688,37 +881,225 @@ def create_google_apps_script(markdown_file: str) -> None:
             args['min'] = match.group(2)
             args['max'] = match.group(3)
             args['max_label'] = match.group(4)
-            current_function = _create_scale_item
+            current_item = 'scale'
             continue
 
         match = _date_time_regex.match(line)
         if match is not None:
-            current_function = _create_date_time_item
+            current_item = 'date_time'
             continue
 
         match = _date_regex.match(line)
         if match is not None:
-            current_function = _create_date_item
+            current_item = 'date'
             continue
 
         match = _duration_regex.match(line)
         if match is not None:
-            current_function = _create_duration_item
+            current_item = 'duration'
             continue
 
         match = _time_regex.match(line)
         if match is not None:
-            current_function = _create_time_item
+            current_item = 'time'
             continue
 
         args['description'] = line
 
     # finished reading the file, create the last item
-    if current_function is not None:
-        code += current_function(**args)
+    if current_item is not None:
+        items.append((current_item, _snapshot_args(args, interned)))
         _reset_args(args)
-        current_function = None
+        current_item = None
+
+    return checkpoints
+
+
+def parse_markdown(markdown_file: str) -> list[tuple[str, dict[str, Any]]]:
+    # returns the items of the form as (kind, arguments), which the backends render
+    items = []
+    _parse_lines(markdown_file.strip().split('\n'), items, {})
+    return items
+
+
+def parse_markdown_incrementally(markdown_file: str, previous: Optional[dict[str, Any]] = None
+                                 ) -> tuple[list[tuple[str, dict[str, Any]]], dict[str, Any]]:
+    # same as parse_markdown, but reuses the state of the previous parse of the same document, only parsing again
+    # from the last title or section before the first changed line. returns the items and the state for the next call
+    lines = markdown_file.strip().split('\n')
+    if previous is None:
+        previous = {'lines': [], 'items': [], 'interned': {}, 'checkpoints': []}
+
+    first_changed = 0
+    for old_line, new_line in zip(previous['lines'], lines):
+        if old_line != new_line:
+            break
+
+        first_changed += 1
+
+    # checkpoints hold the state before their line, so the changed line itself can be one
+    kept = [c for c in previous['checkpoints'] if c['line'] <= first_changed]
+    checkpoint = kept[-1] if len(kept) > 0 else None
+
+    # a full parse starts with new interned lists, so they don't pile up over a long session
+    interned = previous['interned'] if checkpoint is not None else {}
+    items = list(previous['items'])
+    checkpoints = kept[:-1] + _parse_lines(lines, items, interned, checkpoint)
+    _logger.debug(f'Parsed from line {checkpoint["line"] if checkpoint is not None else 0} of {len(lines)}')
+
+    return items, {'lines': lines, 'items': items, 'interned': interned, 'checkpoints': checkpoints}
+
+
+def register_backend(name: str, backend: Backend) -> None:
+    _backends[name] = backend
+
+
+def available_backends() -> list[str]:
+    return list(_backends)
+
+
+def stream_output(items: list[tuple[str, dict[str, Any]]], backend: str = 'apps_script',
+                  function_name: str = 'createForm') -> Iterator[str]:
+    if backend not in _backends:
+        raise ValueError(f'Unknown backend: {backend}. Available backends: {", ".join(_backends)}')
+
+    _logger.debug(f'Rendering {len(items)} items with backend {backend}')
+
+    return _backends[backend](items, function_name)
+
+
+def create_google_apps_script(markdown_file: str, function_name: str = 'createForm', backend: str = 'apps_script') -> str:
+    return ''.join(stream_output(parse_markdown(markdown_file), backend, function_name))
+
+
+def create_outputs(markdown_file: str, backends: list[str]) -> dict[str, str]:
+    # parses the file once and renders it with each of the backends
+    items = parse_markdown(markdown_file)
+    return {backend: ''.join(stream_output(items, backend)) for backend in backends}
+
+
+def split_forms(markdown_file: str) -> list[str]:
+    # every main title (#) starts a new form, anything before the first one belongs to it
+    forms = []
+    lines = []
+    found_main_title = False
+
+    for line in markdown_file.strip().split('\n'):
+        if _form_start_regex.match(line) is not None:
+            if found_main_title:
+                forms.append('\n'.join(lines))
+                lines = []
+
+            found_main_title = True
+
+        lines.append(line)
+
+    if any(len(l.strip()) > 0 for l in lines):
+        forms.append('\n'.join(lines))
+
+    _logger.debug(f'Split markdown into {len(forms)} forms')
+
+    return forms
+
+
+def _multi_form_function_name(index: int) -> str:
+    return f'createForm_{index}'
+
+
+def _shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _get_executor(max_workers: Optional[int]):
+    # one process pool is shared by all requests, since starting one costs more than converting most documents.
+    # it is started again if a different max_workers is asked for
+    global _executor, _executor_workers, _executor_unavailable
+    if _executor is not None and _executor_workers != max_workers:
+        _shutdown_executor()
+
+    if _executor is None and not _executor_unavailable:
+        # imported here, since multiprocessing is slow to import and most requests have a single form
+        import atexit
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        try:
+            # the web app runs threads (e.g. live preview streams), which aren't safe to fork
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+            _executor_workers = max_workers
+            atexit.register(_shutdown_executor)
+        except (ImportError, NotImplementedError, OSError) as e:
+            # e.g. serverless environments without /dev/shm
+            _logger.warning(f'Could not start process pool, converting forms serially: {e}')
+            _executor_unavailable = True
+
+    return _executor
+
+
+def _parse_forms(forms: list[str], max_workers: Optional[int] = None) -> list[list[tuple[str, dict[str, Any]]]]:
+    # parses each form, in parallel for big documents
+    total_lines = sum(form.count('\n') + 1 for form in forms)
+
+    if (max_workers == 1 or (os.cpu_count() or 1) <= 1 or len(forms) < _parallel_min_forms or
+            total_lines < _parallel_min_lines):
+        return [parse_markdown(form) for form in forms]
+
+    executor = _get_executor(max_workers)
+    if executor is not None:
+        try:
+            return list(executor.map(parse_markdown, forms, chunksize=4))
+        except (OSError, RuntimeError) as e:
+            # BrokenProcessPool is a RuntimeError, a new pool is started on the next request
+            _logger.warning(f'Process pool failed, converting forms serially: {e}')
+            _shutdown_executor()
+
+    return [parse_markdown(form) for form in forms]
+
+
+def create_google_apps_scripts(markdown_file: str, max_workers: Optional[int] = None) -> list[str]:
+    # converts each form of a multi-form document into its own, standalone, createForm_N function
+    forms_items = _parse_forms(split_forms(markdown_file), max_workers)
+    return [''.join(_apps_script_backend(items, _multi_form_function_name(i)))
+            for i, items in enumerate(forms_items, 1)]
+
+
+def _dispatcher(forms_count: int, function_name: str) -> str:
+    lines = [f'{_multi_form_function_name(i)}();' for i in range(1, forms_count + 1)]
+    return f'function {function_name}() {{\n{_concatenate_lines(lines)}\n}}'
+
+
+def combine_google_apps_scripts(scripts: list[str], function_name: str = 'createForms') -> str:
+    # joins the createForm_N functions into a single script with a function that creates all forms
+    return '\n\n'.join([_dispatcher(len(scripts), function_name), *scripts])
+
+
+def combine_form_items(forms_items: list[list[tuple[str, dict[str, Any]]]], function_name: str = 'createForms') -> str:
+    # renders parsed forms as a single script with a function that creates all forms. lists repeated anywhere in the
+    # script are declared once, before all functions
+    shared = _share_repeated_lists([item for items in forms_items for item in items])
+    scripts = [''.join(_apps_script_backend(items, _multi_form_function_name(i), shared))
+               for i, items in enumerate(forms_items, 1)]
+
+    return _declare_shared_lists(shared, 0) + '\n\n'.join([_dispatcher(len(scripts), function_name), *scripts])
+
+
+def create_combined_google_apps_script(markdown_file: str, max_workers: Optional[int] = None) -> str:
+    return combine_form_items(_parse_forms(split_forms(markdown_file), max_workers))
+
+
+def convert_document(markdown_file: str, backend: str = 'apps_script', multiple_forms: bool = False) -> str:
+    # entry point of the web routes, raises ValueError for unknown backends or unsupported combinations
+    if backend not in _backends:
+        raise ValueError(f'Unknown backend: {backend}. Available backends: {", ".join(_backends)}')
+
+    if not multiple_forms:
+        return create_google_apps_script(markdown_file, backend=backend)
 
-    code += end_create_form()
+    if backend != 'apps_script':
+        raise ValueError('Multiple forms are only supported by the apps_script backend')
 
-    return code
\ No newline at end of file
+    return create_combined_google_apps_script(markdown_file)
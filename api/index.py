@@ -1,40 +1,102 @@
+import os
 from pathlib import Path
 
-from flask import Flask, render_template, request
-from .google_forms import create_google_apps_script
+from flask import Flask, Response, render_template, request, stream_with_context
+from .google_forms import available_backends, convert_document, create_google_apps_script
 
 TITLE = 'Markdown to Google Forms via Google Apps Script'
+LIVE_PREVIEW = os.environ.get('LIVE_PREVIEW', '').lower() in ('1', 'true', 'yes')
+SAMPLE_MARKDOWN = Path('samples/sample.md')
+# precomputed with `python -m scripts.build_sample`
+SAMPLE_SCRIPT = Path('samples/sample.gs')
 app = Flask(__name__)
 
+
+@app.context_processor
+def _template_globals():
+    return {'live_preview': LIVE_PREVIEW}
+
+
+def _sample_script(code: str) -> str:
+    if SAMPLE_SCRIPT.exists():
+        return SAMPLE_SCRIPT.read_text()
+
+    return create_google_apps_script(code)
+
+
 @app.route('/', methods=['GET', 'POST'])
 def _root():
     if request.method == 'POST':
         if 'create' in request.form:
             code = request.form.get('markdown_code')
+            multiple_forms = 'multiple_forms' in request.form
+            backend = request.form.get('backend', 'apps_script')
 
             if code is not None and len(code) > 0:
                 values = {
+                    'backend': backend,
+                    'backends': available_backends(),
                     'code': code,
-                    'form_script': create_google_apps_script(code),
+                    'multiple_forms': multiple_forms,
                     'title': TITLE,
                 }
 
+                try:
+                    values['form_script'] = convert_document(code, backend, multiple_forms)
+                except Exception as e:
+                    values['error'] = str(e)
+                    return render_template('index.html', **values), 400
+
                 return render_template('index.html', **values)
 
         elif 'reset' in request.form:
-            code = Path('samples/sample.md').read_text()
+            code = SAMPLE_MARKDOWN.read_text()
             values = {
+                'backends': available_backends(),
                 'code': code,
-                'form_script': create_google_apps_script(code),
+                'form_script': _sample_script(code),
                 'title': TITLE,
             }
 
             return render_template('index.html', **values)
 
     values = {
+        'backends': available_backends(),
         'code': '',
         'form_script': '',
         'title': TITLE,
     }
 
-    return render_template('index.html', **values)
\ No newline at end of file
+    return render_template('index.html', **values)
+
+
+# live preview keeps its sessions in memory and holds connections open, so it only works on a single long-running
+# server (e.g. flask run) and is disabled unless the LIVE_PREVIEW environment variable is set
+if LIVE_PREVIEW:
+    from .live_preview import DesynchronizedError, get_session, stream_events
+
+    @app.route('/preview/<session_id>', methods=['POST'])
+    def _preview_update(session_id: str):
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return {'error': 'Body must be a JSON object'}, 400
+
+        backend = payload.get('backend', 'apps_script')
+        if backend not in available_backends():
+            return {'error': f'Unknown backend: {backend}'}, 400
+
+        try:
+            get_session(session_id).update(payload.get('changes', []), bool(payload.get('multiple_forms', False)),
+                                           backend)
+        except DesynchronizedError as e:
+            return {'error': str(e)}, 409
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        return '', 204
+
+    @app.route('/preview/<session_id>/events')
+    def _preview_events(session_id: str):
+        headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        return Response(stream_with_context(stream_events(get_session(session_id))), mimetype='text/event-stream',
+                        headers=headers)
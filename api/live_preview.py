@@ -0,0 +1,191 @@
+import difflib
+import json
+import logging
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from .google_forms import (combine_form_items, convert_document, parse_markdown, parse_markdown_incrementally,
+                           split_forms, stream_output)
+
+
+_logger = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = 0.3
+HEARTBEAT_SECONDS = 15
+SESSION_TIMEOUT_SECONDS = 10 * 60
+
+_sessions: dict[str, 'PreviewSession'] = {}
+_sessions_lock = threading.Lock()
+
+
+class DesynchronizedError(Exception):
+    # the client edited a text different from the one the server has, and must send the whole text again
+    pass
+
+
+def _validate_changes(changes: Any) -> None:
+    # raises ValueError unless changes is a list of {'start': int, 'end': int, 'length': int, 'text': str}, all optional
+    if not isinstance(changes, list):
+        raise ValueError('"changes" must be a list')
+
+    for change in changes:
+        if not isinstance(change, dict):
+            raise ValueError('Each change must be an object')
+
+        for key in ('start', 'end', 'length'):
+            # bool is a subclass of int, but not a valid position
+            if key in change and (not isinstance(change[key], int) or isinstance(change[key], bool)):
+                raise ValueError(f'"{key}" must be an integer')
+
+        if 'text' in change and not isinstance(change['text'], str):
+            raise ValueError('"text" must be a string')
+
+
+class PreviewSession:
+    def __init__(self):
+        self.text = ''
+        self.multiple_forms = False
+        self.backend = 'apps_script'
+        self.version = 0
+        self.changed_at = time.monotonic()
+        self.last_seen = time.monotonic()
+        self._condition = threading.Condition()
+        # parse state of the single form, so only the part after the first changed title or section is parsed again
+        self._parse_state: Optional[dict[str, Any]] = None
+        # parsed items of each form, so unchanged forms aren't parsed again even if they moved
+        self._form_items: dict[str, list[tuple[str, dict[str, Any]]]] = {}
+
+    def update(self, changes: list[dict[str, Any]], multiple_forms: bool = False,
+               backend: str = 'apps_script') -> None:
+        _validate_changes(changes)
+
+        with self._condition:
+            text = self.text
+            for change in changes:
+                if 'length' in change and change['length'] != len(text):
+                    raise DesynchronizedError(f'Expected text with length {change["length"]}, got {len(text)}')
+
+                start = change.get('start', 0)
+                end = change.get('end', len(text))
+                if not 0 <= start <= end <= len(text):
+                    raise DesynchronizedError(f'Invalid change range: {start} - {end}')
+
+                text = text[:start] + change.get('text', '') + text[end:]
+
+            self.text = text
+            self.multiple_forms = multiple_forms
+            self.backend = backend
+            self.version += 1
+            self.changed_at = time.monotonic()
+            self.last_seen = self.changed_at
+            self._condition.notify_all()
+
+    def wait_for_changes(self, version: int, timeout: float,
+                         debounce: float = DEBOUNCE_SECONDS) -> Optional[tuple[int, str, bool, str]]:
+        # waits for a version newer than the given one, and then for the editor to be quiet for the debounce time
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.version == version:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # an open stream keeps its session alive, even if the user isn't typing
+                    self.last_seen = time.monotonic()
+                    return None
+
+                self._condition.wait(remaining)
+
+            while True:
+                quiet_for = time.monotonic() - self.changed_at
+                if quiet_for >= debounce:
+                    break
+
+                self._condition.wait(debounce - quiet_for)
+
+            self.last_seen = time.monotonic()
+            return self.version, self.text, self.multiple_forms, self.backend
+
+    def convert(self, text: str, multiple_forms: bool, backend: str = 'apps_script') -> str:
+        # a single form is parsed again from the last title or section before the first changed line. in multiple
+        # forms mode only the forms that changed are parsed again
+        if not multiple_forms:
+            items, self._parse_state = parse_markdown_incrementally(text, self._parse_state)
+            return ''.join(stream_output(items, backend))
+
+        if backend != 'apps_script':
+            # raises the same error as the other routes
+            return convert_document(text, backend, multiple_forms)
+
+        forms_items = []
+        form_items = {}
+        for form in split_forms(text):
+            items = self._form_items.get(form)
+            if items is None:
+                items = parse_markdown(form)
+
+            form_items[form] = items
+            forms_items.append(items)
+
+        _logger.debug(f'Parsed {len(form_items.keys() - self._form_items.keys())} of {len(forms_items)} forms')
+        self._form_items = form_items
+
+        return combine_form_items(forms_items)
+
+
+def get_session(session_id: str) -> PreviewSession:
+    now = time.monotonic()
+    with _sessions_lock:
+        for key in [k for k, s in _sessions.items() if now - s.last_seen > SESSION_TIMEOUT_SECONDS]:
+            _logger.debug(f'Removing idle preview session {key}')
+            del _sessions[key]
+
+        session = _sessions.get(session_id)
+        if session is None:
+            session = PreviewSession()
+            _sessions[session_id] = session
+
+        session.last_seen = now
+
+    return session
+
+
+def diff_regions(old_lines: list[str], new_lines: list[str]) -> list[dict[str, Any]]:
+    # regions refer to line numbers of the old script, replaced lines [start, end) by the given lines
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+    return [{'start': i1, 'end': i2, 'lines': new_lines[j1:j2]}
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def _event(name: str, data: dict[str, Any]) -> str:
+    return f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+def stream_events(session: PreviewSession) -> Iterator[str]:
+    # server-sent events with the regions of the script that changed since the last event of this connection
+    lines = None
+    version = -1
+
+    while True:
+        changes = session.wait_for_changes(version, HEARTBEAT_SECONDS)
+        if changes is None:
+            yield ': heartbeat\n\n'
+            continue
+
+        version, text, multiple_forms, backend = changes
+        try:
+            script = session.convert(text, multiple_forms, backend) if len(text.strip()) > 0 else ''
+        except Exception as e:
+            # not named 'error', which EventSource uses for connection errors
+            yield _event('conversion-error', {'version': version, 'message': str(e)})
+            continue
+
+        # the first event of a connection holds the whole script, so a reconnecting client starts from scratch
+        full = lines is None
+        new_lines = script.split('\n')
+        regions = diff_regions(lines or [], new_lines)
+        lines = new_lines
+
+        if full or len(regions) > 0:
+            _logger.debug(f'Sending {len(regions)} changed regions for version {version}')
+            yield _event('patch', {'version': version, 'full': full, 'regions': regions})
@@ -0,0 +1,171 @@
+function createForm() {
+  var values1 = ['Radio Option 1', 'Radio Option 2', 'Radio Option 3'];
+  var values2 = ['Combo Option 1', 'Combo Option 2', 'Combo Option 3'];
+  var values3 = ['Check Option 1', 'Check Option 2', 'Check Option 3'];
+  var values4 = ['Row 1', 'Row 2', 'Row 3'];
+  var values5 = ['Column 1', 'Column 2', 'Column 3'];
+
+  var form = FormApp.create("Forms Title")
+    .setDescription("This is a test script to convert a markdown file to a Google Forms script. It is still in development, so it may not work as expected. If you want to have more than one section, you must first explicit their names here:")
+    .setConfirmationMessage("Thanks for testing this script!");
+
+  var sections = {};
+
+  var section = form.addPageBreakItem()
+    .setTitle("Section 2");
+
+  sections["Section 2"] = section;
+
+  var section = form.addPageBreakItem()
+    .setTitle("Section 3");
+
+  sections["Section 3"] = section;
+
+  var item = form.addMultipleChoiceItem()
+    .setTitle("Radio buttons");
+
+  item.setChoices([
+      item.createChoice("Radio Navigation Option 1", sections["Section 2"]),
+      item.createChoice("Radio Navigation Option 2", sections["Section 3"])
+    ])
+    .setHelpText("Use `*` at the start of each line to indicate that the list is a radio button list. If you want any item to be required, write the text between `**`.")
+    .setRequired(true);
+
+  form.addSectionHeaderItem()
+    .setTitle("Title and description")
+    .setHelpText("Use this to add a title and a description to the form.");
+
+  sections["Section 2"]
+    .setTitle("Section 2")
+    .setHelpText("Section 2 description");
+
+  form.moveItem(form.getItemById(sections["Section 2"].getId()), form.getItems().length - 1);
+
+  form.addTextItem()
+    .setTitle("Short text 1");
+
+  form.addTextItem()
+    .setTitle("Long text 1")
+    .setHelpText("This indicates a long text field, and its contents will be ignored.");
+
+  form.addSectionHeaderItem()
+    .setTitle("Title and description 1")
+    .setHelpText("Use this to add a title and a description to the form.");
+
+  form.addMultipleChoiceItem()
+    .setTitle("Radio buttons 1")
+    .setChoiceValues(values1)
+    .setHelpText("Use `*` at the start of each line to indicate that the list is a radio button list. If you want any item to be required, write the text between `**`.")
+    .setRequired(true);
+
+  form.addMultipleChoiceItem()
+    .setTitle("Combobox 1")
+    .setChoiceValues(values2)
+    .setHelpText("Use `-` at the start of each line to indicate that the list is a radio button list.");
+
+  form.addMultipleChoiceItem()
+    .setTitle("Checkboxes 1")
+    .setChoiceValues(values3)
+    .setHelpText("Use `[]` at the start of each line to indicate that the list is a checkbox list. It doesn't matter if it starts with `-` or `*`, or even if the checkoxes have a space or not inside.");
+
+  form.addScaleItem()
+    .setTitle("Scale 1")
+    .setBounds(1, 5)
+    .setLabels("Lowest", "Highest")
+    .setHelpText("To create a scale, simply write the lowest label and its value, then a `---`, and finally the highest value and its label, in this order.");
+
+  form.addDateTimeItem()
+    .setTitle("Date 1")
+    .setHelpText("To create a date item, simply write this date format.");
+
+  form.addDurationItem()
+    .setTitle("Time 1")
+    .setHelpText("To create a time item, simply write this time format.");
+
+  form.addDateTimeItem()
+    .setTitle("Date and time 1")
+    .setHelpText("To create a date and time item, simply write this date and time format.");
+
+  form.addDurationItem()
+    .setTitle("Duration 1")
+    .setHelpText("To create a duration item, simply write this duration format.");
+
+  form.addGridItem()
+    .setTitle("RadioButton Grid")
+    .setRows(values4)
+    .setColumns(values5)
+    .setHelpText("To create a radio button grid, simply write the rows and columns. Note that the rows **MUST BE** written as `#### rows` and the columns **MUST BE** written as `#### columns`, ignoring case.");
+
+  form.addCheckboxGridItem()
+    .setTitle("Checkbox Grid")
+    .setRows(values4)
+    .setColumns(values5)
+    .setHelpText("To create a checkbox grid, simply write the rows and columns. Note that the rows **MUST BE** written as `#### [] rows` and the columns **MUST BE** written as `#### [] columns`, ignoring case.");
+
+  sections["Section 3"]
+    .setTitle("Section 3")
+    .setHelpText("Section 3 description");
+
+  form.moveItem(form.getItemById(sections["Section 3"].getId()), form.getItems().length - 1);
+
+  form.addTextItem()
+    .setTitle("Short text 2");
+
+  form.addTextItem()
+    .setTitle("Long text 2")
+    .setHelpText("This indicates a long text field, and its contents will be ignored.");
+
+  form.addSectionHeaderItem()
+    .setTitle("Title and description 2")
+    .setHelpText("Use this to add a title and a description to the form.");
+
+  form.addMultipleChoiceItem()
+    .setTitle("Radio buttons 2")
+    .setChoiceValues(values1)
+    .setHelpText("Use `*` at the start of each line to indicate that the list is a radio button list. If you want any item to be required, write the text between `**`.")
+    .setRequired(true);
+
+  form.addMultipleChoiceItem()
+    .setTitle("Combobox 2")
+    .setChoiceValues(values2)
+    .setHelpText("Use `-` at the start of each line to indicate that the list is a radio button list.");
+
+  form.addMultipleChoiceItem()
+    .setTitle("Checkboxes 2")
+    .setChoiceValues(values3)
+    .setHelpText("Use `[]` at the start of each line to indicate that the list is a checkbox list. It doesn't matter if it starts with `-` or `*`, or even if the checkoxes have a space or not inside.");
+
+  form.addScaleItem()
+    .setTitle("Scale 2")
+    .setBounds(1, 5)
+    .setLabels("Lowest", "Highest")
+    .setHelpText("To create a scale, simply write the lowest label and its value, then a `---`, and finally the highest value and its label, in this order.");
+
+  form.addDateTimeItem()
+    .setTitle("Date 2")
+    .setHelpText("To create a date item, simply write this date format.");
+
+  form.addDurationItem()
+    .setTitle("Time 2")
+    .setHelpText("To create a time item, simply write this time format.");
+
+  form.addDateTimeItem()
+    .setTitle("Date and time 2")
+    .setHelpText("To create a date and time item, simply write this date and time format.");
+
+  form.addDurationItem()
+    .setTitle("Duration 2")
+    .setHelpText("To create a duration item, simply write this duration format.");
+
+  form.addGridItem()
+    .setTitle("RadioButton Grid")
+    .setRows(values4)
+    .setColumns(values5)
+    .setHelpText("To create a radio button grid, simply write the rows and columns. Note that the rows **MUST BE** written as `#### rows` and the columns **MUST BE** written as `#### columns`, ignoring case.");
+
+  form.addCheckboxGridItem()
+    .setTitle("Checkbox Grid")
+    .setRows(values4)
+    .setColumns(values5)
+    .setHelpText("To create a checkbox grid, simply write the rows and columns. Note that the rows **MUST BE** written as `#### [] rows` and the columns **MUST BE** written as `#### [] columns`, ignoring case.");
+}
\ No newline at end of file
@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+from api.google_forms import create_google_apps_script
+
+
+# precomputes the script for the sample, so resetting the example in the web app doesn't need to convert it on every request
+# run from the repository root with: python -m scripts.build_sample
+# or with --check to only verify that the precomputed script is up to date, failing otherwise
+SAMPLE_MARKDOWN = Path('samples/sample.md')
+SAMPLE_SCRIPT = Path('samples/sample.gs')
+
+
+def main() -> None:
+    script = create_google_apps_script(SAMPLE_MARKDOWN.read_text())
+
+    if '--check' in sys.argv[1:]:
+        if not SAMPLE_SCRIPT.exists() or SAMPLE_SCRIPT.read_text() != script:
+            print(f'{SAMPLE_SCRIPT} is out of date, run: python -m scripts.build_sample')
+            sys.exit(1)
+
+        print(f'{SAMPLE_SCRIPT} is up to date')
+        return
+
+    SAMPLE_SCRIPT.write_text(script)
+    print(f'Wrote {SAMPLE_SCRIPT}')
+
+
+if __name__ == '__main__':
+    main()
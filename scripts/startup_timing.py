@@ -0,0 +1,108 @@
+import statistics
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+
+from api.google_forms import available_backends, parse_markdown, stream_output
+
+
+# measures cold start cost by timing fresh interpreters importing each entry point and running a first conversion
+# compares each optimization against the path it replaced,
+# and how long parsing and rendering with each backend take once warm
+# run from the repository root with: python -m scripts.startup_timing [runs]
+_CONVERSION = (
+    'from pathlib import Path\n'
+    'from api.google_forms import create_google_apps_script\n'
+    'create_google_apps_script(Path("samples/sample.md").read_text())'
+)
+
+_SNIPPETS = {
+    'interpreter only': 'pass',
+    'api.google_forms import': 'import api.google_forms',
+    'api.convert import': 'import api.convert',
+    'api.index import (Flask)': 'import api.index',
+    'first conversion (sample)': _CONVERSION,
+}
+
+# (untimed setup, before, after) showing what each cold start optimization saves.
+# lazy regexes only move the compilation out of the import, so the first conversion still pays for it
+_COMPARISONS = {
+    'regexes at import (eager/lazy)': (
+        'import api.google_forms as g',
+        '[g.re.compile(r.pattern) for r in vars(g).values() if isinstance(r, g._LazyRegex)]',
+        'pass',
+    ),
+    'entry point (index/convert)': (
+        'pass',
+        'import api.index\n' + _CONVERSION,
+        'import api.convert\n' + _CONVERSION,
+    ),
+    'reset sample (convert/read)': (
+        'from pathlib import Path\n'
+        'from api.google_forms import create_google_apps_script',
+        'create_google_apps_script(Path("samples/sample.md").read_text())',
+        'Path("samples/sample.gs").read_text()',
+    ),
+}
+
+_TIMER = '''
+import time
+exec({setup!r})
+_start = time.perf_counter()
+exec({snippet!r})
+print(time.perf_counter() - _start)
+'''
+
+
+def _time_snippet(snippet: str, runs: int, setup: str = 'pass') -> list[float]:
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', _TIMER.format(setup=setup, snippet=snippet)],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+        timings.append(float(result.stdout.strip()) * 1000)
+
+    return timings
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f'{"step":<30} {"median (ms)":>12} {"min (ms)":>10}')
+    for name, snippet in _SNIPPETS.items():
+        try:
+            timings = _time_snippet(snippet, runs)
+        except RuntimeError as e:
+            print(f'{name:<30} {"skipped":>12}  ({e})')
+            continue
+
+        print(f'{name:<30} {statistics.median(timings):>12.2f} {min(timings):>10.2f}')
+
+    print()
+    print(f'{"comparison":<30} {"before (ms)":>12} {"after (ms)":>10} {"saved (ms)":>10}')
+    for name, (setup, before, after) in _COMPARISONS.items():
+        try:
+            before_time = statistics.median(_time_snippet(before, runs, setup))
+            after_time = statistics.median(_time_snippet(after, runs, setup))
+        except RuntimeError as e:
+            print(f'{name:<30} {"skipped":>12}  ({e})')
+            continue
+
+        print(f'{name:<30} {before_time:>12.2f} {after_time:>10.2f} {before_time - after_time:>10.2f}')
+
+    markdown_file = Path('samples/sample.md').read_text()
+    items = parse_markdown(markdown_file)
+    steps = {'parse (sample)': lambda: parse_markdown(markdown_file)}
+    for backend in available_backends():
+        steps[f'render {backend} (sample)'] = lambda backend=backend: ''.join(stream_output(items, backend))
+
+    print()
+    for name, step in steps.items():
+        timings = [t * 1000 for t in timeit.repeat(step, number=1, repeat=runs * 10)]
+        print(f'{name:<30} {statistics.median(timings):>12.2f} {min(timings):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()